@@ -2,7 +2,7 @@
 
 Loads raw data from two sources (Kaggle CSV + scraped Academy CSV),
 normalizes both, merges them (preferring the Academy version on
-duplicates), and outputs cleaned_speeches.csv.
+duplicates), and outputs cleaned_speeches.parquet.
 
 Usage:
     python scripts/clean_speeches.py
@@ -13,17 +13,22 @@ from __future__ import annotations
 import re
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from config import MIN_YEAR, TARGET_CATEGORIES, OUTPUT_COLUMNS
+from config import (
+    CANONICAL_CATEGORIES, CSV_DTYPES, CSV_READ_KW, MIN_YEAR, TARGET_CATEGORIES,
+    OUTPUT_COLUMNS,
+)
+from table_io import write_table
 
 RAW_DIR = Path(__file__).resolve().parent.parent / "data" / "raw"
 KAGGLE_PATH = RAW_DIR / "kaggle_speeches.csv"
 ACADEMY_PATH = RAW_DIR / "academy_scraped.csv"
-OUT_PATH = Path(__file__).resolve().parent.parent / "data" / "cleaned_speeches.csv"
+OUT_PATH = Path(__file__).resolve().parent.parent / "data" / "cleaned_speeches.parquet"
 
 # Regex for the Year column in Kaggle data, e.g. "2016 (89th) Academy Awards"
-_YEAR_RE = re.compile(r"^(\d{4})\s+\((\d+)(?:st|nd|rd|th)\)")
+_YEAR_RE = re.compile(r"^(?P<year>\d{4})\s+\((?P<ceremony>\d+)(?:st|nd|rd|th)\)")
 
 # Regex for parenthetical notes in the Winner field
 _PAREN_NOTE_RE = re.compile(r"\s*\(.*?\)\s*$")
@@ -31,6 +36,44 @@ _PAREN_NOTE_RE = re.compile(r"\s*\(.*?\)\s*$")
 # Regex for the "WINNER NAME:\n" header that starts many speeches
 _SPEECH_HEADER_RE = re.compile(r"^\s*[A-Z][A-Z\s.''\-]+:\s*\n?")
 
+# Read the text columns as Arrow-backed strings so missing values stay <NA>
+# (no "nan" strings).  The str.replace calls below pass the compiled
+# patterns, which keeps Python re semantics (e.g. \s matching NBSP); a
+# pattern string would be run by pyarrow's RE2 instead.
+_KAGGLE_DTYPES = {
+    "Winner": "string[pyarrow]",
+    "Speech": "string[pyarrow]",
+    "Film Title": "string[pyarrow]",
+}
+_ACADEMY_DTYPES = {
+    **CSV_DTYPES,
+    "winner": "string[pyarrow]",
+    "speech": "string[pyarrow]",
+    "film_title": "string[pyarrow]",
+}
+
+# Category lookup tables, built once.  Raw category strings are looked up
+# in _RAW_CATEGORY_DTYPE's categories and the resulting codes are remapped onto
+# _CANONICAL_CATEGORY_DTYPE; the trailing -1 keeps unmatched rows (code -1)
+# missing.  Reusing the dtypes keeps their category hash tables across calls.
+_RAW_CATEGORY_DTYPE = pd.CategoricalDtype(list(TARGET_CATEGORIES))
+_CANONICAL_CATEGORY_DTYPE = pd.CategoricalDtype(CANONICAL_CATEGORIES)
+_CANONICAL_CODES = np.array(
+    [CANONICAL_CATEGORIES.index(c) for c in TARGET_CATEGORIES.values()] + [-1]
+)
+
+
+def _normalize_categories(raw: pd.Series) -> pd.Categorical:
+    """Map raw category strings to a canonical categorical (NaN if unmatched)."""
+    # get_indexer gives -1 for strings outside TARGET_CATEGORIES (and for
+    # missing values) instead of relying on astype() to null them out.
+    codes = _RAW_CATEGORY_DTYPE.categories.get_indexer(
+        raw.to_numpy(dtype=object, na_value=None)
+    )
+    return pd.Categorical.from_codes(
+        _CANONICAL_CODES[codes], dtype=_CANONICAL_CATEGORY_DTYPE
+    )
+
 
 # ---------------------------------------------------------------------------
 # Kaggle source
@@ -41,39 +84,31 @@ def load_kaggle(path: Path = KAGGLE_PATH) -> pd.DataFrame:
     if not path.exists():
         return pd.DataFrame(columns=OUTPUT_COLUMNS + ["_source"])
 
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, dtype=_KAGGLE_DTYPES, **CSV_READ_KW)
     df = df.dropna(how="all")
 
     # Parse year/ceremony from formatted string
-    years, ceremonies = [], []
-    for val in df["Year"]:
-        m = _YEAR_RE.match(str(val))
-        if m:
-            years.append(int(m.group(1)))
-            ceremonies.append(int(m.group(2)))
-        else:
-            years.append(None)
-            ceremonies.append(None)
-    df["year"] = pd.array(years, dtype=pd.Int64Dtype())
-    df["ceremony"] = pd.array(ceremonies, dtype=pd.Int64Dtype())
+    parsed = df["Year"].astype(str).str.extract(_YEAR_RE)
+    df["year"] = pd.to_numeric(parsed["year"], errors="coerce").astype("Int64")
+    df["ceremony"] = pd.to_numeric(parsed["ceremony"], errors="coerce").astype("Int64")
 
     # Normalize categories
-    df["category"] = df["Category"].map(TARGET_CATEGORIES)
+    df["category"] = _normalize_categories(df["Category"])
     df = df.dropna(subset=["category"])
 
     # Filter by year
     df = df[df["year"] >= MIN_YEAR]
 
     # Clean winner names
-    df["winner_raw"] = df["Winner"].astype(str).str.strip()
-    df["winner_clean"] = df["winner_raw"].apply(
-        lambda s: _PAREN_NOTE_RE.sub("", s).strip()
+    df["winner_raw"] = df["Winner"].str.strip()
+    df["winner_clean"] = (
+        df["winner_raw"].str.replace(_PAREN_NOTE_RE, "", regex=True).str.strip()
     )
 
     # Clean speeches
     df["speech_clean"] = (
-        df["Speech"].astype(str).str.strip()
-        .apply(lambda s: _SPEECH_HEADER_RE.sub("", s).strip())
+        df["Speech"].str.strip()
+        .str.replace(_SPEECH_HEADER_RE, "", regex=True).str.strip()
     )
 
     # Film title
@@ -92,34 +127,33 @@ def load_academy(path: Path = ACADEMY_PATH) -> pd.DataFrame:
     if not path.exists():
         return pd.DataFrame(columns=OUTPUT_COLUMNS + ["_source"])
 
-    df = pd.read_csv(path)
-    df = df.dropna(how="all")
-
     # year and ceremony are already numeric from the scraper
-    df["year"] = pd.array(df["year"], dtype=pd.Int64Dtype())
-    df["ceremony"] = pd.array(df["ceremony"], dtype=pd.Int64Dtype())
+    df = pd.read_csv(path, dtype=_ACADEMY_DTYPES, **CSV_READ_KW)
+    df = df.dropna(how="all")
+    # Records without a speech are saved (empty) only so the scraper can resume
+    df = df.dropna(subset=["speech"])
 
     # Normalize categories (scraper stores raw category strings)
-    df["category"] = df["category"].map(TARGET_CATEGORIES)
+    df["category"] = _normalize_categories(df["category"])
     df = df.dropna(subset=["category"])
 
     # Filter by year
     df = df[df["year"] >= MIN_YEAR]
 
     # Clean winner names
-    df["winner_raw"] = df["winner"].astype(str).str.strip()
-    df["winner_clean"] = df["winner_raw"].apply(
-        lambda s: _PAREN_NOTE_RE.sub("", s).strip()
+    df["winner_raw"] = df["winner"].str.strip()
+    df["winner_clean"] = (
+        df["winner_raw"].str.replace(_PAREN_NOTE_RE, "", regex=True).str.strip()
     )
 
     # Clean speeches — remove the "WINNER NAME:\n" header
     df["speech_clean"] = (
-        df["speech"].astype(str).str.strip()
-        .apply(lambda s: _SPEECH_HEADER_RE.sub("", s).strip())
+        df["speech"].str.strip()
+        .str.replace(_SPEECH_HEADER_RE, "", regex=True).str.strip()
     )
 
     # Film title
-    df["film_title"] = df["film_title"].astype(str).str.strip()
+    df["film_title"] = df["film_title"].str.strip()
 
     df["_source"] = "academy"
     return df[OUTPUT_COLUMNS + ["_source"]]
@@ -133,12 +167,17 @@ def merge_sources(kaggle: pd.DataFrame, academy: pd.DataFrame) -> pd.DataFrame:
     """Merge both sources, preferring academy on (year, category) duplicates."""
     combined = pd.concat([academy, kaggle], ignore_index=True)
 
-    # Drop duplicates on (year, category), keeping first = academy (concat order)
-    before = len(combined)
-    combined = combined.drop_duplicates(subset=["year", "category"], keep="first")
-    dupes = before - len(combined)
-    if dupes:
-        print(f"Deduplication: removed {dupes} Kaggle rows that overlap with Academy data")
+    # One hashing pass over (year, category), keeping first = academy (concat
+    # order).  This also drops repeats within a source, which matters because
+    # (year, category) is the labels key and must be unique.
+    dup = combined.duplicated(subset=["year", "category"], keep="first")
+    dropped = combined.loc[dup, "_source"].value_counts()
+    if dropped.get("kaggle", 0):
+        print(f"Deduplication: removed {dropped['kaggle']} Kaggle rows that overlap "
+              f"with Academy data (or repeat within Kaggle)")
+    if dropped.get("academy", 0):
+        print(f"Deduplication: removed {dropped['academy']} repeated Academy rows")
+    combined = combined[~dup]
 
     # Drop the source column, sort, and reset index
     combined = combined.drop(columns=["_source"])
@@ -151,7 +190,7 @@ def merge_sources(kaggle: pd.DataFrame, academy: pd.DataFrame) -> pd.DataFrame:
 # ---------------------------------------------------------------------------
 
 def run_pipeline(out_path: Path = OUT_PATH) -> pd.DataFrame:
-    """Run the full cleaning pipeline and write to CSV."""
+    """Run the full cleaning pipeline and write the cleaned table."""
     print("Loading Kaggle data...")
     kaggle = load_kaggle()
     print(f"  {len(kaggle)} rows from Kaggle")
@@ -164,14 +203,16 @@ def run_pipeline(out_path: Path = OUT_PATH) -> pd.DataFrame:
 
     # Write output
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out_path, index=False)
+    write_table(df, out_path)
     print(f"\nWrote {len(df)} rows to {out_path}")
 
     # Verification
     print("\n--- Verification ---")
-    print(f"Unique categories ({len(df['category'].unique())}): {sorted(df['category'].unique())}")
-    print(f"Year range: {df['year'].min()} – {df['year'].max()}")
-    nulls = df[["year", "category", "winner_clean", "speech_clean"]].isnull().sum()
+    cats = df["category"].unique()
+    ymin, ymax = df["year"].agg(["min", "max"])
+    print(f"Unique categories ({len(cats)}): {sorted(cats)}")
+    print(f"Year range: {ymin} – {ymax}")
+    nulls = df[["year", "category", "winner_clean", "speech_clean"]].isna().sum()
     print(f"Null counts in key columns:\n{nulls}")
     dupes = df.duplicated(subset=["year", "category"], keep=False)
     print(f"Duplicate (year, category) pairs: {dupes.sum()}")
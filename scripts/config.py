@@ -2,6 +2,19 @@
 
 MIN_YEAR = 1993
 
+# --- CSV reading ---
+
+# Keyword arguments for every pd.read_csv call: Arrow-backed columns, parsed
+# by the default C engine.  (engine="pyarrow" is not used: its block-parallel
+# reader can't handle the newlines inside quoted speech fields once a file
+# is larger than one block.)
+CSV_READ_KW: dict = {"dtype_backend": "pyarrow"}
+
+# Explicit dtypes for the numeric columns of the speech/label CSVs, so they
+# load as nullable ints directly instead of being re-cast after reading.
+# Columns missing from a given file are ignored.
+CSV_DTYPES: dict[str, str] = {"year": "Int64", "ceremony": "Int64"}
+
 # Map raw category strings to canonical names.
 # Any category not listed here will be dropped.
 TARGET_CATEGORIES: dict[str, str] = {
@@ -55,6 +68,17 @@ TASK_DEPENDENCIES: dict[str, list[str]] = {
     "snippet_grading": ["golden_snippet"],
 }
 
+# Output-token budget per task, so a runaway response can't run long.
+# Redaction echoes the whole speech back with markup; the rest are a score,
+# a sentence, or a short snippet.
+TASK_MAX_OUTPUT_TOKENS: dict[str, int] = {
+    "distinctiveness": 16,
+    "redaction": 4096,
+    "plot_hint": 128,
+    "snippet_selection": 512,
+    "snippet_grading": 16,
+}
+
 # Composite key used to join speeches with labels
 LABELS_KEY_COLUMNS = ["year", "category"]
 
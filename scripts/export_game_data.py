@@ -1,6 +1,6 @@
 """Export labeled speeches as JSON for the game UI.
 
-Reads the merged speeches-with-labels CSV, filters to speeches with
+Reads the merged speeches-with-labels table, filters to speeches with
 snippet_grading >= 3, and writes game/data.json.
 
 Usage:
@@ -16,16 +16,36 @@ import random
 import re
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # optional; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import re2  # google-re2: linear-time matching for the redaction scans
+except ImportError:
+    re2 = re
+
+from table_io import read_table
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
-MERGED_PATH = PROJECT_ROOT / "data" / "speeches_with_labels.csv"
-TEST_MERGED_PATH = PROJECT_ROOT / "data" / "test_speeches_with_labels.csv"
-CLEANED_PATH = PROJECT_ROOT / "data" / "cleaned_speeches.csv"
+MERGED_PATH = PROJECT_ROOT / "data" / "speeches_with_labels.parquet"
+TEST_MERGED_PATH = PROJECT_ROOT / "data" / "test_speeches_with_labels.parquet"
+CLEANED_PATH = PROJECT_ROOT / "data" / "cleaned_speeches.parquet"
 OUTPUT_PATH = PROJECT_ROOT / "game" / "data.json"
 
-REDACT_PATTERN = re.compile(r"\[REDACT:\s*(.*?)\]")
+REDACT_PATTERN = re2.compile(r"\[REDACT:\s*(.*?)\]")
+
+# Text wrapped in a pair of each kind of quote, tried in this order so that
+# e.g. """"text"""" loses the triple quotes and then the single ones.
+OUTER_QUOTE_PATTERNS = [
+    re.compile(rf"^{re.escape(q)}(.+){re.escape(q)}$", re.DOTALL)
+    for q in ('"""', "'''", '"', "'")
+]
 
 MIN_SNIPPET_GRADE = 3
 
@@ -35,82 +55,117 @@ def render_redacted(marked_up: str) -> str:
     return REDACT_PATTERN.sub("______", marked_up)
 
 
-def extract_redactions(marked_up: str) -> list[str]:
-    """Pull out the list of redacted strings in order."""
-    return REDACT_PATTERN.findall(marked_up)
+def split_redactions(marked_up: str) -> tuple[str, list[str]]:
+    """Return (render_redacted(marked_up), redacted strings in order) in one scan.
+
+    REDACT_PATTERN has a single capture group, so split() alternates literal
+    text (even indices) with redacted strings (odd indices).
+    """
+    parts = REDACT_PATTERN.split(marked_up)
+    return "______".join(parts[::2]), parts[1::2]
 
 
 def _safe(value):
-    """Convert pandas NaN/NaT to None for JSON serialisation."""
-    if isinstance(value, float) and pd.isna(value):
-        return None
-    if pd.isna(value):
+    """Convert pandas NaN/NaT/NA to None for JSON serialisation."""
+    if isinstance(value, float):
+        return None if value != value else value  # NaN is the only x != x
+    if value is None or value is pd.NA or value is pd.NaT:
         return None
     return value
 
 
-def strip_outer_quotes(text: str) -> str:
+def strip_outer_quotes(texts: pd.Series) -> pd.Series:
     """Remove wrapping triple-quotes or single-quotes left by the LLM."""
-    text = text.strip()
-    for q in ['"""', "'''", '"', "'"]:
-        if text.startswith(q) and text.endswith(q) and len(text) > len(q) * 2:
-            text = text[len(q):-len(q)].strip()
-    return text
+    texts = texts.astype(str).str.strip()
+    for pattern in OUTER_QUOTE_PATTERNS:
+        texts = texts.str.replace(pattern, r"\1", regex=True).str.strip()
+    return texts
+
+
+def index_pool(pool: pd.DataFrame) -> dict:
+    """Precompute the title lookups pick_film_options samples from.
+
+    *pool* is the full cleaned_speeches DataFrame.  Returns a dict with
+    ``titles_by_cat`` (category -> list of unique titles), its complement
+    ``other_titles_by_cat`` (category -> unique titles from every other
+    category), ``all_titles``, plus ``year_by_title`` and ``cat_by_title``
+    taken from each title's first row in the pool.
+    """
+    pool = pool.dropna(subset=["film_title"])
+    first = pool.drop_duplicates("film_title")
+    unique_titles = (
+        pool.groupby("category", observed=True, sort=False)["film_title"].unique()
+    )
+    titles_by_cat = {cat: titles.tolist() for cat, titles in unique_titles.items()}
+    other_titles_by_cat = {
+        cat: list(dict.fromkeys(
+            t for other, titles in titles_by_cat.items() if other != cat for t in titles))
+        for cat in titles_by_cat
+    }
+    return {
+        "titles_by_cat": titles_by_cat,
+        "other_titles_by_cat": other_titles_by_cat,
+        "all_titles": first["film_title"].tolist(),
+        "year_by_title": dict(zip(first["film_title"], first["year"].astype(int))),
+        "cat_by_title": dict(zip(first["film_title"], first["category"])),
+    }
 
 
-def _sample_titles(pool: pd.DataFrame, n: int, exclude: set[str],
-                    year: int | None = None, year_range: int = 5) -> list[str]:
-    """Sample up to *n* unique film titles from *pool*, excluding *exclude*.
+def _sample_titles(titles: list[str], n: int, exclude: set[str],
+                   years: dict[str, int] | None = None, year: int | None = None,
+                   year_range: int = 5) -> list[str]:
+    """Sample up to *n* film titles from the unique *titles*, excluding *exclude*.
 
-    If *year* is given, prefer films within ±year_range first; if not enough,
-    widen to the full pool.
+    If *year* and *years* (title -> year) are given, prefer films within
+    ±year_range first; if not enough, widen to all of *titles*.
     """
-    candidates = pool[~pool["film_title"].isin(exclude)]
-    if year is not None:
-        nearby = candidates[(candidates["year"] >= year - year_range) &
-                            (candidates["year"] <= year + year_range)]
-        nearby_titles = nearby["film_title"].unique().tolist()
+    candidates = [t for t in titles if t not in exclude]
+    if year is not None and years:
+        nearby_titles = [t for t in candidates if abs(years[t] - year) <= year_range]
         if len(nearby_titles) >= n:
             return random.sample(nearby_titles, n)
         # Not enough nearby — take what we can, fill from the rest
         remaining = n - len(nearby_titles)
-        far = candidates[~candidates["film_title"].isin(set(nearby_titles))]
-        far_titles = far["film_title"].unique().tolist()
+        nearby_set = set(nearby_titles)
+        far_titles = [t for t in candidates if t not in nearby_set]
         return nearby_titles + random.sample(far_titles, min(remaining, len(far_titles)))
-    titles = candidates["film_title"].unique().tolist()
-    return random.sample(titles, min(n, len(titles)))
+    return random.sample(candidates, min(n, len(candidates)))
 
 
-def pick_film_options(pool: pd.DataFrame, row: pd.Series) -> list[str]:
-    """Return 6 shuffled film titles: 3 same-category cluster + 3 decoy cluster.
+def pick_film_options(pool_index: dict, correct_film: str, category: str,
+                      year: int) -> list[str]:
+    """Return 6 film titles: 3 same-category cluster + 3 decoy cluster.
 
-    *pool* is the full cleaned_speeches DataFrame (all 134 rows).
+    The options come back cluster-ordered (correct film first); callers
+    shuffle them, see shuffle_options().
+
+    *pool_index* is the result of index_pool() over the full cleaned_speeches
+    DataFrame.
     """
-    correct_film = row["film_title"]
-    category = row["category"]
-    year = int(row["year"])
+    titles_by_cat = pool_index["titles_by_cat"]
+    year_by_title = pool_index["year_by_title"]
+    all_titles = pool_index["all_titles"]
 
     used: set[str] = {correct_film}
 
     # --- Same-category cluster: correct film + 2 others from same category ---
-    same_cat = pool[pool["category"] == category]
-    same_picks = _sample_titles(same_cat, 2, exclude=used, year=year)
+    same_cat = titles_by_cat.get(category, [])
+    same_picks = _sample_titles(same_cat, 2, exclude=used, years=year_by_title, year=year)
     used.update(same_picks)
     same_cluster = [correct_film] + same_picks
 
     # --- Decoy cluster: 1 film from different category, then 2 from *that* film's category ---
-    diff_cat = pool[pool["category"] != category]
-    seed_picks = _sample_titles(diff_cat, 1, exclude=used, year=year)
+    diff_cat = pool_index["other_titles_by_cat"].get(category, all_titles)
+    seed_picks = _sample_titles(diff_cat, 1, exclude=used, years=year_by_title, year=year)
     if not seed_picks:
         # Extreme fallback: just grab anything not used
-        seed_picks = _sample_titles(pool, 1, exclude=used)
+        seed_picks = _sample_titles(all_titles, 1, exclude=used)
     if seed_picks:
         seed_film = seed_picks[0]
         used.add(seed_film)
-        seed_row = pool[pool["film_title"] == seed_film].iloc[0]
-        seed_cat = pool[pool["category"] == seed_row["category"]]
-        decoy_peers = _sample_titles(seed_cat, 2, exclude=used,
-                                     year=int(seed_row["year"]))
+        seed_cat = titles_by_cat[pool_index["cat_by_title"][seed_film]]
+        decoy_peers = _sample_titles(seed_cat, 2, exclude=used, years=year_by_title,
+                                     year=year_by_title[seed_film])
         used.update(decoy_peers)
         decoy_cluster = [seed_film] + decoy_peers
     else:
@@ -119,40 +174,74 @@ def pick_film_options(pool: pd.DataFrame, row: pd.Series) -> list[str]:
     # --- Combine and pad if needed ---
     options = same_cluster + decoy_cluster
     if len(options) < 6:
-        extra = _sample_titles(pool, 6 - len(options), exclude=set(options))
+        extra = _sample_titles(all_titles, 6 - len(options), exclude=set(options))
         options.extend(extra)
 
-    random.shuffle(options)
     return options
 
 
-def build_game_data(df: pd.DataFrame, pool: pd.DataFrame) -> dict:
-    """Build the JSON structure for the game."""
+def shuffle_options(all_options: list[list[str]],
+                    rng: np.random.Generator) -> list[list[str]]:
+    """Shuffle each speech's film options independently.
+
+    When every speech has the same number of options (the normal case) this
+    is a single row-wise permutation of a 2-D array.
+    """
+    if all_options and len({len(o) for o in all_options}) == 1:
+        return rng.permuted(np.array(all_options, dtype=object), axis=1).tolist()
+    return [rng.permutation(np.array(o, dtype=object)).tolist() for o in all_options]
+
+
+def build_game_data(df: pd.DataFrame, pool: pd.DataFrame,
+                    seed: int | None = None) -> dict:
+    """Build the JSON structure for the game.
+
+    Pass *seed* to make the sampled and shuffled film options reproducible.
+    """
+    if seed is not None:
+        random.seed(seed)
+    rng = np.random.default_rng(seed)
+
     # Filter to rows with good snippets
     df = df[df["snippet_grading"] >= MIN_SNIPPET_GRADE].copy()
     df = df.reset_index(drop=True)
     print(f"Filtered to {len(df)} speeches with snippet_grading >= {MIN_SNIPPET_GRADE}")
 
-    speeches = []
-    for i, row in df.iterrows():
-        golden_snippet = strip_outer_quotes(str(row["golden_snippet"]))
-        redacted_speech = strip_outer_quotes(str(row["redacted_speech"]))
-        speech_clean = str(row["speech_clean"])
+    pool_index = index_pool(pool)
+
+    # Pull each column out once as a plain list and index by position.
+    years = df["year"].astype(int).tolist()
+    cats = df["category"].tolist()
+    # Free-text columns may be missing; _safe turns NA into JSON null.
+    films = [_safe(v) for v in df["film_title"].tolist()]
+    winners = [_safe(v) for v in df["winner_clean"].tolist()]
+    snippets = strip_outer_quotes(df["golden_snippet"]).tolist()
+    redacted = strip_outer_quotes(df["redacted_speech"]).tolist()
+    raw_speeches = [_safe(v) for v in df["speech_clean"].tolist()]
+    hints = [_safe(v) for v in df["plot_hint"].tolist()]
+    grades = df["snippet_grading"].astype(int).tolist()
+
+    all_options = [pick_film_options(pool_index, films[i], cats[i], years[i])
+                   for i in range(len(df))]
+    all_options = shuffle_options(all_options, rng)
 
+    speeches = []
+    for i in range(len(df)):
+        snippet_display, redactions = split_redactions(snippets[i])
         speeches.append({
-            "id": int(i),
-            "year": int(row["year"]),
-            "category": row["category"],
-            "film_title": row["film_title"],
-            "winner_clean": row["winner_clean"],
-            "golden_snippet": golden_snippet,
-            "snippet_display": render_redacted(golden_snippet),
-            "redactions": extract_redactions(golden_snippet),
-            "full_speech_display": render_redacted(redacted_speech),
-            "full_speech_raw": speech_clean,
-            "plot_hint": _safe(row["plot_hint"]),
-            "snippet_grading": int(row["snippet_grading"]),
-            "film_options": pick_film_options(pool, row),
+            "id": i,
+            "year": years[i],
+            "category": cats[i],
+            "film_title": films[i],
+            "winner_clean": winners[i],
+            "golden_snippet": snippets[i],
+            "snippet_display": snippet_display,
+            "redactions": redactions,
+            "full_speech_display": render_redacted(redacted[i]),
+            "full_speech_raw": raw_speeches[i],
+            "plot_hint": hints[i],
+            "snippet_grading": grades[i],
+            "film_options": all_options[i],
         })
 
     categories = sorted(df["category"].unique().tolist())
@@ -163,24 +252,35 @@ def build_game_data(df: pd.DataFrame, pool: pd.DataFrame) -> dict:
     }
 
 
+def write_json(data: dict, path: Path) -> None:
+    """Write *data* as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(
+            data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Export game data as JSON")
     parser.add_argument("--test", action="store_true",
                         help="Use test subset instead of full dataset")
+    parser.add_argument("--seed", type=int,
+                        help="Random seed for reproducible film options")
     args = parser.parse_args()
 
     input_path = TEST_MERGED_PATH if args.test else MERGED_PATH
-    df = pd.read_csv(input_path)
+    df = read_table(input_path)
     print(f"Loaded {len(df)} rows from {input_path.name}")
 
-    pool = pd.read_csv(CLEANED_PATH)
+    pool = read_table(CLEANED_PATH)
     print(f"Loaded {len(pool)} rows from {CLEANED_PATH.name} as decoy pool")
 
-    game_data = build_game_data(df, pool)
+    game_data = build_game_data(df, pool, seed=args.seed)
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(game_data, f, indent=2, ensure_ascii=False)
+    write_json(game_data, OUTPUT_PATH)
 
     print(f"Wrote {len(game_data['speeches'])} speeches to {OUTPUT_PATH}")
     print(f"Categories: {game_data['categories']}")
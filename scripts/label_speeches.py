@@ -1,7 +1,7 @@
 """Incremental LLM labeling pipeline for Oscar speeches.
 
-Reads cleaned_speeches.csv, calls Gemini to label speeches using prompt
-templates from the prompts/ directory, and stores results in labels.csv.
+Reads cleaned_speeches.parquet, calls Gemini to label speeches using prompt
+templates from the prompts/ directory, and stores results in labels.parquet.
 
 Each task (e.g. distinctiveness) has:
   - A markdown prompt template in prompts/{task}.md
@@ -14,52 +14,85 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
+import json
 import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import httpx
 import pandas as pd
 from dotenv import load_dotenv
 from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
 
-from config import LABELS_KEY_COLUMNS, TASKS, TASK_DEPENDENCIES
+try:
+    import re2  # google-re2: linear-time matching for the redaction scans
+except ImportError:
+    re2 = re
+
+from config import LABELS_KEY_COLUMNS, TASKS, TASK_DEPENDENCIES, TASK_MAX_OUTPUT_TOKENS
+from rate_limiter import RateLimiter
+from table_io import read_table, resolve_table, write_table
 
 # --- Paths ---
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 PROMPTS_DIR = PROJECT_ROOT / "prompts"
+RESPONSE_CACHE_PATH = PROJECT_ROOT / ".cache" / "gemini_responses.jsonl"
 
 # Default (production) paths; overridden by --test flag.
-SPEECHES_PATH = PROJECT_ROOT / "data" / "cleaned_speeches.csv"
-LABELS_PATH = PROJECT_ROOT / "data" / "labels.csv"
-MERGED_PATH = PROJECT_ROOT / "data" / "speeches_with_labels.csv"
+SPEECHES_PATH = PROJECT_ROOT / "data" / "cleaned_speeches.parquet"
+LABELS_PATH = PROJECT_ROOT / "data" / "labels.parquet"
+MERGED_PATH = PROJECT_ROOT / "data" / "speeches_with_labels.parquet"
 
 TEST_SPEECHES_PATH = PROJECT_ROOT / "data" / "test_speeches.csv"
-TEST_LABELS_PATH = PROJECT_ROOT / "data" / "test_labels.csv"
-TEST_MERGED_PATH = PROJECT_ROOT / "data" / "test_speeches_with_labels.csv"
+TEST_LABELS_PATH = PROJECT_ROOT / "data" / "test_labels.parquet"
+TEST_MERGED_PATH = PROJECT_ROOT / "data" / "test_speeches_with_labels.parquet"
 
 
 # --- API setup ---
 
+@functools.lru_cache(maxsize=1)
 def init_gemini() -> genai.Client:
-    """Load API key from .env and return configured client."""
+    """Load API key from .env and return configured client.
+
+    Memoized, so every caller in a process shares one client and its
+    connection pool.
+    """
     load_dotenv(PROJECT_ROOT / ".env")
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY not set. Add it to .env")
-    return genai.Client(api_key=api_key)
+    return genai.Client(
+        api_key=api_key,
+        http_options=genai_types.HttpOptions(timeout=REQUEST_TIMEOUT_MS),
+    )
 
 
 MODEL_NAME = "gemini-2.0-flash"
 
+# Per-request timeout, and how many times to try a call that times out or
+# hits a transient error (rate limit / 5xx) before giving up on that row.
+REQUEST_TIMEOUT_MS = 30_000
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
 
 # --- Data loading ---
 
 def load_existing_labels(path: Path = LABELS_PATH) -> pd.DataFrame:
     """Load existing labels or create empty DataFrame with key columns."""
-    if path.exists():
-        df = pd.read_csv(path)
-        print(f"Loaded {len(df)} existing labels from {path.name}")
+    # Falls back to a labels.csv from before the Parquet switch, so existing
+    # (and hand-relabeled) labels aren't discarded
+    source = resolve_table(path)
+    if source.exists():
+        df = read_table(source)
+        print(f"Loaded {len(df)} existing labels from {source.name}")
         return df
     print("No existing labels file; starting fresh.")
     return pd.DataFrame(columns=LABELS_KEY_COLUMNS)
@@ -83,27 +116,27 @@ def find_unlabeled(
 
 # --- Prompt loading ---
 
+@functools.lru_cache(maxsize=None)
 def load_prompt(task_name: str) -> str:
-    """Load a prompt template from prompts/{task_name}.md."""
+    """Load a prompt template from prompts/{task_name}.md (cached per task)."""
     path = PROMPTS_DIR / f"{task_name}.md"
     if not path.exists():
         raise FileNotFoundError(f"Prompt file not found: {path}")
     return path.read_text(encoding="utf-8")
 
 
-def build_prompt(task_name: str, row: pd.Series) -> str:
-    """Load prompt template and fill placeholders from row columns.
+def build_prompt(task_name: str, row: dict) -> str:
+    """Load prompt template and fill placeholders from a row dict.
 
     The row may include columns from prior labels (merged in by the pipeline)
     so that downstream tasks can reference earlier outputs.
     """
-    template = load_prompt(task_name)
-    return template.format(**row.to_dict())
+    return load_prompt(task_name).format_map(row)
 
 
 # --- Response parsers ---
 
-REDACT_PATTERN = re.compile(r"\[REDACT:\s*(.*?)\]")
+REDACT_PATTERN = re2.compile(r"\[REDACT:\s*(.*?)\]")
 
 
 def parse_int_score(text: str) -> int | None:
@@ -169,17 +202,69 @@ TASK_LABEL_COLUMNS: dict[str, str] = {
 
 # --- Gemini call ---
 
-def call_gemini(client: genai.Client, prompt: str) -> str | None:
-    """Send prompt to Gemini and return raw response text."""
-    try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-        )
-        return response.text
-    except Exception as e:
-        print(f"  API error: {e}")
-        return None
+def _is_retryable(e: Exception) -> bool:
+    """True for errors worth retrying: timeouts, rate limits, server errors."""
+    if isinstance(e, httpx.TimeoutException):
+        return True
+    return isinstance(e, genai_errors.APIError) and e.code in RETRYABLE_STATUS
+
+
+def call_gemini(
+    client: genai.Client, prompt: str, max_output_tokens: int | None = None,
+) -> str | None:
+    """Send prompt to Gemini and return raw response text.
+
+    Transient failures are retried up to MAX_ATTEMPTS times with exponential
+    backoff; anything else (or the last failure) is reported and returns None.
+    """
+    config = genai_types.GenerateContentConfig(max_output_tokens=max_output_tokens)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            response = client.models.generate_content(
+                model=MODEL_NAME,
+                contents=prompt,
+                config=config,
+            )
+            return response.text
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS or not _is_retryable(e):
+                print(f"  API error: {e}")
+                return None
+            time.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+
+# --- Response cache ---
+
+def response_cache_key(prompt: str, max_output_tokens: int | None = None) -> str:
+    """Hash everything that determines a response: model, prompt, token budget."""
+    blob = f"{MODEL_NAME}\0{prompt}\0{max_output_tokens}"
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def load_response_cache(path: Path = RESPONSE_CACHE_PATH) -> dict[str, str]:
+    """Load cached raw responses keyed by response_cache_key (later lines win).
+
+    Lines that don't parse (e.g. one truncated by a crash mid-append) are
+    skipped, so a damaged entry costs one cache miss rather than every run.
+    """
+    if not path.exists():
+        return {}
+    cache = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                cache[entry["key"]] = entry["raw"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return cache
+
+
+def append_response_cache(key: str, raw: str, path: Path = RESPONSE_CACHE_PATH) -> None:
+    """Append one raw response to the cache file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"key": key, "raw": raw, "ts": time.time()}) + "\n")
 
 
 # --- Generic labeling ---
@@ -189,25 +274,42 @@ def label_task(
     unlabeled: pd.DataFrame,
     task_name: str,
     delay: float = 0.5,
+    workers: int = 4,
 ) -> pd.DataFrame:
-    """Label all unlabeled rows for a given task. Returns new labels."""
+    """Label all unlabeled rows for a given task. Returns new labels.
+
+    Up to *workers* API calls run concurrently; call starts are spaced at
+    least *delay* seconds apart across all workers to respect rate limits.
+    """
     parser = PARSERS[task_name]
     col = TASK_LABEL_COLUMNS.get(task_name, task_name)
-    results = []
-    for i, (_, row) in enumerate(unlabeled.iterrows()):
-        print(f"  [{i + 1}/{len(unlabeled)}] {row['year']} {row['category']}: "
-              f"{row['winner_clean'][:30]}...")
-        raw = call_gemini(client, build_prompt(task_name, row))
-        if raw is not None:
-            parsed = parser(raw)
-            if parsed is not None:
-                results.append({
-                    "year": row["year"],
-                    "category": row["category"],
-                    col: parsed,
-                })
-        if delay > 0:
-            time.sleep(delay)
+    records = unlabeled.to_dict("records")
+    limiter = RateLimiter(delay)
+    max_tokens = TASK_MAX_OUTPUT_TOKENS.get(task_name)
+
+    def label_one(row: dict) -> str | int | None:
+        limiter.wait()
+        raw = call_gemini(client, build_prompt(task_name, row), max_tokens)
+        return parser(raw) if raw is not None else None
+
+    # Collect by position so the output keeps the input row order.
+    parsed_values: list = [None] * len(records)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {ex.submit(label_one, row): i for i, row in enumerate(records)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            row = records[i]
+            winner = row["winner_clean"]
+            winner = winner[:30] if isinstance(winner, str) else "(no winner)"
+            print(f"  [{done}/{len(records)}] {row['year']} {row['category']}: "
+                  f"{winner}...")
+            parsed_values[i] = future.result()
+
+    results = [
+        {"year": row["year"], "category": row["category"], col: parsed}
+        for row, parsed in zip(records, parsed_values)
+        if parsed is not None
+    ]
     new_labels = pd.DataFrame(results)
     print(f"Successfully labeled {len(new_labels)} / {len(unlabeled)} rows")
     return new_labels
@@ -215,35 +317,43 @@ def label_task(
 
 # --- Persistence ---
 
-def save_labels(
-    existing: pd.DataFrame,
-    new_labels: pd.DataFrame,
-    path: Path = LABELS_PATH,
-) -> pd.DataFrame:
-    """Merge new label columns into existing labels and save.
+def update_labels(existing: pd.DataFrame, new_labels: pd.DataFrame) -> pd.DataFrame:
+    """Merge new label columns into existing labels (in memory).
 
-    Uses a left join so that new_labels only fills in its own columns
-    without clobbering other label columns already present in existing.
+    Only the cells for new_labels' own columns and keys are overwritten;
+    other label columns already present in existing are left untouched.
     """
-    if new_labels.empty:
-        print("No new labels to save.")
-        return existing
-
     # Columns being added/updated by this task
     new_cols = [c for c in new_labels.columns if c not in LABELS_KEY_COLUMNS]
 
     if existing.empty:
         combined = new_labels.copy()
     else:
-        # Update existing labels with new values.  Set key columns as index so
-        # combine_first aligns rows correctly, then new_labels values take
-        # priority over existing values for the same (year, category, column).
+        # Update existing labels in place.  Index both frames by the key
+        # columns, add rows for any new keys, then overwrite just the new
+        # columns at new_labels' keys (avoids combine_first's full realign).
         existing_ix = existing.set_index(LABELS_KEY_COLUMNS)
         new_ix = new_labels.set_index(LABELS_KEY_COLUMNS)
-        combined = new_ix.combine_first(existing_ix).reset_index()
+        existing_ix = existing_ix.reindex(existing_ix.index.union(new_ix.index))
+        for c in new_cols:
+            existing_ix.loc[new_ix.index, c] = new_ix[c]
+        combined = existing_ix.reset_index()
+
+    return combined.sort_values(LABELS_KEY_COLUMNS).reset_index(drop=True)
+
+
+def save_labels(
+    existing: pd.DataFrame,
+    new_labels: pd.DataFrame,
+    path: Path = LABELS_PATH,
+) -> pd.DataFrame:
+    """Merge new label columns into existing labels and save (see update_labels)."""
+    if new_labels.empty:
+        print("No new labels to save.")
+        return existing
 
-    combined = combined.sort_values(LABELS_KEY_COLUMNS).reset_index(drop=True)
-    combined.to_csv(path, index=False)
+    combined = update_labels(existing, new_labels)
+    write_table(combined, path)
     print(f"Saved {len(combined)} labels ({len(combined.columns) - len(LABELS_KEY_COLUMNS)} label columns) to {path.name}")
     return combined
 
@@ -255,14 +365,14 @@ def merge_for_output(
 ) -> pd.DataFrame:
     """Left-join labels onto speeches and write merged output."""
     merged = speeches.merge(labels, on=LABELS_KEY_COLUMNS, how="left")
-    merged.to_csv(path, index=False)
+    write_table(merged, path)
     print(f"Wrote merged output ({len(merged)} rows) to {path.name}")
     return merged
 
 
 # --- Pipeline ---
 
-def run_pipeline(test: bool = False) -> pd.DataFrame:
+def run_pipeline(test: bool = False, workers: int = 4) -> pd.DataFrame:
     """Run the full incremental labeling pipeline."""
     if test:
         speeches_path, labels_path, merged_path = (
@@ -272,7 +382,7 @@ def run_pipeline(test: bool = False) -> pd.DataFrame:
         speeches_path, labels_path, merged_path = (
             SPEECHES_PATH, LABELS_PATH, MERGED_PATH)
 
-    speeches = pd.read_csv(speeches_path)
+    speeches = read_table(speeches_path)
     print(f"Loaded {len(speeches)} speeches from {speeches_path.name}")
 
     labels = load_existing_labels(labels_path)
@@ -304,7 +414,7 @@ def run_pipeline(test: bool = False) -> pd.DataFrame:
                 how="left",
             )
 
-        new_labels = label_task(client, unlabeled, task_name)
+        new_labels = label_task(client, unlabeled, task_name, workers=workers)
         labels = save_labels(labels, new_labels, labels_path)
 
     # Produce merged output
@@ -317,7 +427,7 @@ def run_pipeline(test: bool = False) -> pd.DataFrame:
         if col in merged.columns:
             coverage = merged[col].notna().sum()
             print(f"'{task_name}' ({col}) coverage: {coverage} / {len(merged)}")
-            if merged[col].dtype in ("int64", "float64"):
+            if pd.api.types.is_numeric_dtype(merged[col]):
                 print(f"  Distribution:\n{merged[col].value_counts().sort_index()}")
             else:
                 print(f"  (text column — {coverage} non-null values)")
@@ -329,5 +439,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="LLM labeling pipeline")
     parser.add_argument("--test", action="store_true",
                         help="Run on 20-speech test subset instead of full dataset")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of concurrent Gemini calls (default 4)")
     args = parser.parse_args()
-    run_pipeline(test=args.test)
+    run_pipeline(test=args.test, workers=args.workers)
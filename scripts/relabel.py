@@ -4,71 +4,117 @@ Usage:
     python relabel.py --film "lord of the rings" --task plot_hint --test
     python relabel.py --film "lord of the rings" --task plot_hint --test \
         --note "Focus on the fantasy quest, not workplace metaphors"
+
+Gemini responses are cached by prompt in .cache/gemini_responses.jsonl, so
+re-running an unchanged prompt costs no API call; pass --no-cache to force one.
+When iterating on several relabels, --skip-merge avoids rewriting the merged
+output each time, or --batch runs a CSV of them in one process:
+
+    python relabel.py --batch fixes.csv   # columns: film, task[, category, note, override]
 """
 
 from __future__ import annotations
 
 import argparse
+import csv
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from config import TASKS, TASK_DEPENDENCIES, TASK_MAX_OUTPUT_TOKENS
+
+# pandas, pyarrow and label_speeches (which pulls in the Gemini SDK) are
+# imported inside the functions that need them, so `--help` and argument
+# errors return without paying for those imports.
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
 
-import pandas as pd
-
-from config import LABELS_KEY_COLUMNS, TASK_DEPENDENCIES
-from label_speeches import (
-    PARSERS,
-    TASK_LABEL_COLUMNS,
-    build_prompt,
-    call_gemini,
-    init_gemini,
-    load_existing_labels,
-    merge_for_output,
-    save_labels,
-    PROJECT_ROOT,
-    SPEECHES_PATH,
-    LABELS_PATH,
-    MERGED_PATH,
-    TEST_SPEECHES_PATH,
-    TEST_LABELS_PATH,
-    TEST_MERGED_PATH,
-)
+# How many candidates to list when a film query is ambiguous
+MAX_LISTED_MATCHES = 10
+
+
+def _contains_ignore_case(col: pd.Series, query: str) -> pa.BooleanArray:
+    """Case-insensitive literal substring test, run in Arrow (nulls -> False)."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    arr = pa.array(col, from_pandas=True)
+    if pa.types.is_dictionary(arr.type):  # categorical columns
+        arr = arr.dictionary_decode()
+    return pc.match_substring(arr, query, ignore_case=True).fill_null(False)
 
 
 def find_speech(speeches: pd.DataFrame, film_query: str, category_query: str | None = None) -> pd.Series:
     """Find a single speech row by case-insensitive substring match on film_title."""
-    mask = speeches["film_title"].str.lower().str.contains(film_query.lower(), na=False)
+    import pyarrow.compute as pc
+
+    mask = _contains_ignore_case(speeches["film_title"], film_query)
     if category_query:
-        mask &= speeches["category"].str.lower().str.contains(category_query.lower(), na=False)
-    matches = speeches[mask]
-    if len(matches) == 0:
+        mask = pc.and_(mask, _contains_ignore_case(speeches["category"], category_query))
+    # Work with positions; only the rows actually returned or listed get built.
+    idx = pc.indices_nonzero(mask).to_numpy()
+    if len(idx) == 0:
         raise SystemExit(f"No speeches found matching '{film_query}'"
                          + (f" with category '{category_query}'" if category_query else ""))
-    if len(matches) > 1:
+    if len(idx) > 1:
+        shown = speeches.iloc[idx[:MAX_LISTED_MATCHES]]
         lines = [f"  {r['year']} | {r['category']} | {r['film_title']} | {r['winner_clean']}"
-                 for _, r in matches.iterrows()]
+                 for _, r in shown.iterrows()]
+        if len(idx) > MAX_LISTED_MATCHES:
+            lines.append(f"  ... and {len(idx) - MAX_LISTED_MATCHES} more")
         raise SystemExit(
             f"Multiple speeches match '{film_query}':\n" + "\n".join(lines)
             + "\nUse --category to narrow your search."
         )
-    return matches.iloc[0]
+    return speeches.iloc[idx[0]]
 
 
-def relabel(film_query: str, task_name: str, note: str | None, override: str | None, category_query: str | None, test: bool) -> None:
-    """Re-run a labeling task for a single speech."""
-    if task_name not in PARSERS:
-        raise SystemExit(f"Unknown task '{task_name}'. Available: {list(PARSERS)}")
+def _resolve_paths(test: bool) -> tuple[Path, Path, Path]:
+    """Return (speeches, labels, merged) paths for the full or test data."""
+    from label_speeches import (
+        LABELS_PATH, MERGED_PATH, SPEECHES_PATH,
+        TEST_LABELS_PATH, TEST_MERGED_PATH, TEST_SPEECHES_PATH,
+    )
 
-    # Resolve paths
     if test:
-        speeches_path, labels_path, merged_path = (
-            TEST_SPEECHES_PATH, TEST_LABELS_PATH, TEST_MERGED_PATH)
         print("=== TEST MODE ===")
-    else:
-        speeches_path, labels_path, merged_path = (
-            SPEECHES_PATH, LABELS_PATH, MERGED_PATH)
+        return TEST_SPEECHES_PATH, TEST_LABELS_PATH, TEST_MERGED_PATH
+    return SPEECHES_PATH, LABELS_PATH, MERGED_PATH
 
-    # Load data
-    speeches = pd.read_csv(speeches_path)
-    labels = load_existing_labels(labels_path)
+
+def relabel_one(
+    speeches: pd.DataFrame,
+    labels: pd.DataFrame,
+    film_query: str,
+    task_name: str,
+    note: str | None = None,
+    override: str | None = None,
+    category_query: str | None = None,
+    response_cache: dict[str, str] | None = None,
+) -> tuple[pd.DataFrame, str, object, object, bool]:
+    """Re-run one task for one speech against already-loaded tables.
+
+    Returns (updated labels, label column, old value, new value, changed);
+    labels come back unchanged, with changed False, if the new value equals
+    the old one.  Nothing is written
+    to disk.  Pass *response_cache* (from load_response_cache) to reuse
+    cached Gemini responses; None always calls the API.
+    """
+    if task_name not in TASKS:
+        raise SystemExit(f"Unknown task '{task_name}'. Available: {TASKS}")
+
+    import pandas as pd
+    from label_speeches import (
+        PARSERS,
+        TASK_LABEL_COLUMNS,
+        append_response_cache,
+        build_prompt,
+        call_gemini,
+        init_gemini,
+        response_cache_key,
+        update_labels,
+    )
 
     # Find the speech
     row = find_speech(speeches, film_query, category_query)
@@ -83,12 +129,8 @@ def relabel(film_query: str, task_name: str, note: str | None, override: str | N
         old_value = labels.loc[label_mask, col].iloc[0]
     print(f"Old {col}: {old_value}")
 
-    # Clear the label for this row
-    if label_mask.any() and col in labels.columns:
-        labels.loc[label_mask, col] = pd.NA
-
     # Build prompt row — merge dependency columns from labels if needed
-    prompt_row = row.copy()
+    prompt_row = row.to_dict()
     deps = TASK_DEPENDENCIES.get(task_name, [])
     if deps and label_mask.any():
         for dep_col in deps:
@@ -96,57 +138,168 @@ def relabel(film_query: str, task_name: str, note: str | None, override: str | N
                 prompt_row[dep_col] = labels.loc[label_mask, dep_col].iloc[0]
 
     if override:
-        # Skip LLM entirely — use the provided value directly
-        new_value = override
+        # Skip LLM entirely — run the value through the task's parser so it
+        # gets the same type and validation as a model response (e.g. "5" -> 5)
+        new_value = PARSERS[task_name](override)
+        if new_value is None:
+            raise SystemExit(f"Invalid override for '{task_name}': {override!r}")
         print(f"Using manual override for '{task_name}'")
     else:
         prompt = build_prompt(task_name, prompt_row)
         if note:
             prompt += f"\n\nNote from reviewer: {note}"
 
-        # Call Gemini
-        client = init_gemini()
-        print(f"Calling Gemini for task '{task_name}'...")
-        raw = call_gemini(client, prompt)
-        if raw is None:
-            raise SystemExit("API call failed.")
+        # Call Gemini, unless this exact prompt has been answered before
+        max_tokens = TASK_MAX_OUTPUT_TOKENS.get(task_name)
+        key = response_cache_key(prompt, max_tokens)
+        raw = response_cache.get(key) if response_cache is not None else None
+        cached = raw is not None
+        if cached:
+            print(f"Cache hit for task '{task_name}'")
+        else:
+            client = init_gemini()
+            print(f"Calling Gemini for task '{task_name}'...")
+            raw = call_gemini(client, prompt, max_tokens)
+            if raw is None:
+                raise SystemExit("API call failed.")
 
         parser = PARSERS[task_name]
         new_value = parser(raw)
         if new_value is None:
             raise SystemExit(f"Could not parse response: {raw!r}")
+        # Only cache responses that parsed, so a bad one is retried next time
+        if not cached:
+            append_response_cache(key, raw)
+            if response_cache is not None:
+                response_cache[key] = raw
+
+    if _same_label(old_value, new_value):
+        print(f"No change to {col}")
+        return labels, col, old_value, new_value, False
 
-    # Save updated label
     new_label = pd.DataFrame([{
         "year": year,
         "category": category,
         col: new_value,
     }])
-    labels = save_labels(labels, new_label, labels_path)
+    return update_labels(labels, new_label), col, old_value, new_value, True
+
 
-    # Re-export merged CSV
-    merge_for_output(speeches, labels, merged_path)
+def _same_label(old_value, new_value) -> bool:
+    """True if new_value equals an existing (non-missing) old_value."""
+    import pandas as pd
+
+    return old_value is not None and not pd.isna(old_value) and old_value == new_value
+
+
+def relabel(film_query: str, task_name: str, note: str | None, override: str | None, category_query: str | None, test: bool, use_cache: bool = True, skip_merge: bool = False) -> None:
+    """Re-run a labeling task for a single speech.
+
+    With *skip_merge*, only the labels table is rewritten; the merged output
+    is left stale until the next run without it (or the next pipeline run).
+    """
+    relabel_many(
+        [{"film": film_query, "task": task_name, "note": note,
+          "override": override, "category": category_query}],
+        test, use_cache=use_cache, skip_merge=skip_merge,
+    )
+
+
+def relabel_many(requests: list[dict], test: bool, use_cache: bool = True, skip_merge: bool = False) -> None:
+    """Re-run several (film, task) relabels, loading and saving the tables once.
+
+    Each request is a dict with "film" and "task" plus optional "category",
+    "note" and "override".  Requests run in order against the updated labels,
+    so a later task sees an earlier one's result (e.g. redaction, then
+    snippet_selection).  A request that fails is reported and skipped.
+    """
+    from label_speeches import load_existing_labels, load_response_cache, merge_for_output
+    from table_io import read_table, write_table
+
+    speeches_path, labels_path, merged_path = _resolve_paths(test)
+
+    # Load data
+    speeches = read_table(speeches_path)
+    labels = load_existing_labels(labels_path)
+    response_cache = load_response_cache() if use_cache else None
+
+    results = []
+    any_changed = False
+    for req in requests:
+        print(f"\n=== {req['film']} / {req['task']} ===")
+        try:
+            labels, col, old_value, new_value, changed = relabel_one(
+                speeches, labels, req["film"], req["task"],
+                note=req.get("note"), override=req.get("override"),
+                category_query=req.get("category"),
+                response_cache=response_cache,
+            )
+        except SystemExit as e:
+            if len(requests) == 1:
+                raise
+            print(f"  Skipped: {e}")
+            continue
+        results.append((req["film"], col, old_value, new_value))
+        any_changed |= changed
+
+    if not any_changed:
+        print("\nNo labels changed; skipping save.")
+        return
+
+    # Save updated labels
+    write_table(labels, labels_path)
+    print(f"Saved {len(labels)} labels to {labels_path.name}")
+
+    # Re-export merged table
+    if skip_merge:
+        print(f"Skipped rewriting {merged_path.name} (--skip-merge)")
+    else:
+        merge_for_output(speeches, labels, merged_path)
 
     # Print confirmation
     print(f"\n--- Result ---")
-    print(f"Old {col}: {old_value}")
-    print(f"New {col}: {new_value}")
+    for film, col, old_value, new_value in results:
+        if len(requests) > 1:
+            print(f"[{film}]")
+        print(f"Old {col}: {old_value}")
+        print(f"New {col}: {new_value}")
+
+
+def read_batch(path: Path) -> list[dict]:
+    """Read relabel requests from a CSV with columns film, task and optionally
+    category, note, override (blank cells mean "not given")."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [{k: (v or None) for k, v in row.items()} for row in csv.DictReader(f)]
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Re-run a labeling task for a specific speech")
-    parser.add_argument("--film", required=True,
+    parser.add_argument("--film",
                         help="Case-insensitive substring match on film_title")
-    parser.add_argument("--task", required=True,
-                        help=f"Labeling task to re-run. Options: {list(PARSERS)}")
+    parser.add_argument("--task",
+                        help=f"Labeling task to re-run. Options: {TASKS}")
     parser.add_argument("--note",
                         help="Optional correction note appended to the prompt")
     parser.add_argument("--override",
                         help="Skip LLM — directly set the label to this value")
     parser.add_argument("--category",
                         help="Case-insensitive substring filter on category (e.g. 'directing')")
+    parser.add_argument("--batch", type=Path,
+                        help="CSV of relabels (columns: film, task[, category, note, override]) "
+                             "run in one process instead of --film/--task")
     parser.add_argument("--test", action="store_true",
                         help="Use test subset files")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call Gemini, ignoring cached responses")
+    parser.add_argument("--skip-merge", action="store_true",
+                        help="Only update the labels table; don't rewrite the merged output")
     args = parser.parse_args()
-    relabel(args.film, args.task, args.note, args.override, args.category, args.test)
+    if args.batch:
+        relabel_many(read_batch(args.batch), args.test,
+                     use_cache=not args.no_cache, skip_merge=args.skip_merge)
+    elif args.film and args.task:
+        relabel(args.film, args.task, args.note, args.override, args.category, args.test,
+                use_cache=not args.no_cache, skip_merge=args.skip_merge)
+    else:
+        parser.error("either --batch or both --film and --task are required")
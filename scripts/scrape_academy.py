@@ -1,23 +1,71 @@
-"""Scrape acceptance speeches from aaspeechesdb.oscars.org using Playwright.
+"""Scrape acceptance speeches from aaspeechesdb.oscars.org.
+
+The site is expected to render its results list and record pages
+server-side, so that plain HTTP requests are enough.  Years are scraped in
+parallel, and records within a year are fetched concurrently from their
+detail URLs (--concurrency per year).  Requests go through a pool of
+MAX_IN_FLIGHT keep-alive sessions, each used by one thread at a time, so at
+most MAX_IN_FLIGHT requests are outstanding; request starts are spaced
+MIN_REQUEST_INTERVAL apart.
+
+Neither the JS-free results list nor DETAIL_URL has yet been confirmed
+against the live site, so the first year is probed before scraping: its
+results list must show the "N records found" banner with N ExpandRecord
+links, and DETAIL_URL must return a speech paragraph for its first record.
+If not, the run falls back to driving the site's own ExpandRecord() JS in a
+headless browser (sequential, like the original scraper).  --browser forces
+that path.
 
 Usage:
     python scripts/scrape_academy.py
     python scripts/scrape_academy.py --start-year 2020 --end-year 2020
+    python scripts/scrape_academy.py --concurrency 8
+    python scripts/scrape_academy.py --fresh     # ignore previously saved rows
+    python scripts/scrape_academy.py --browser   # drive ExpandRecord() in Chromium
 
-Requires: pip install playwright && playwright install chromium
+Requires: pip install requests lxml pyarrow
+Browser fallback: pip install playwright && playwright install chromium
 """
 
 from __future__ import annotations
 
 import argparse
-import csv
+import json
+import queue
+import random
 import re
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from playwright.sync_api import sync_playwright, Page
+import lxml.html
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimiter
 
 OUT_PATH = Path(__file__).resolve().parent.parent / "data" / "raw" / "academy_scraped.csv"
+OUT_SCHEMA = pa.schema([
+    ("year", pa.int64()),
+    ("ceremony", pa.int64()),
+    ("category", pa.string()),
+    ("film_title", pa.string()),
+    ("winner", pa.string()),
+    ("speech", pa.string()),
+    ("record_num", pa.int64()),
+])
+# One JSON line per record (or year) that still failed after all retries
+FAILED_PATH = OUT_PATH.with_name("academy_failed.jsonl")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
 
 # URL template: returns all results for a given year on one page (NP=255)
 SEARCH_URL = (
@@ -26,6 +74,57 @@ SEARCH_URL = (
     "&AC=QBE_QUERY&RF=WebReportList&DF=WebReportOscars&MR=0&NP=255"
 )
 
+# URL template for a single expanded record: the same query, fetched with
+# the GET_RECORD action that the page's ExpandRecord(n) JS submits.  RN is
+# the 0-based position of the record in the result set (ExpandRecord's n is
+# 1-based).  NOTE: this template follows the site's WebPublisher URL
+# conventions but has not been checked against a captured ExpandRecord
+# request (including any session/table parameters); confirm it in browser
+# DevTools > Network on one year.  Until then main() probes it and falls
+# back to the browser path if it doesn't return a record.
+DETAIL_URL = (
+    "https://aaspeechesdb.oscars.org/results.aspx"
+    "?QY=find%20(year%20term%20ct%20{year})"
+    "&AC=GET_RECORD&RF=WebReportList&DF=WebReportOscars&MR=0&NP=255&RN={rn}"
+)
+
+# Default number of records fetched concurrently per year
+CONCURRENCY = 4
+
+# Number of years scraped in parallel
+YEAR_WORKERS = 8
+
+# Number of sessions in the pool, which caps outstanding requests across all
+# threads, and the minimum spacing between request starts (0.2s = at most 5
+# requests/s overall).  Spacing starts rather than sleeping after each
+# response means a fast response doesn't leave its session idle.
+MAX_IN_FLIGHT = 4
+MIN_REQUEST_INTERVAL = 0.2
+
+# Attempts per request before giving up; waits ~2s, ~4s, ... (plus jitter,
+# capped at RETRY_MAX_DELAY) between attempts.  Only timeouts, connection
+# errors, 429 and 5xx are retried -- anything else fails immediately.
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 30.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT = 30
+
+# Record number in a results-list link's href
+_RECORD_ID_RE = re.compile(r"ExpandRecord\((\d+)\)")
+
+# "N records found" banner on the results list
+_COUNT_RE = re.compile(r"(\d+)\s+records?\s+found", re.IGNORECASE)
+
+# Any tag in a record's speech HTML; the "br" group marks line breaks
+_HTML_CLEAN_RE = re.compile(r"<(?P<br>br\s*/?)>|<[^>]+>", re.IGNORECASE)
+
+
+def _clean_tag(m: re.Match) -> str:
+    """_HTML_CLEAN_RE replacement: newline for <br>, nothing for other tags."""
+    return "\n" if m.group("br") else ""
+
+
 # Ceremony number = year - 1927 (e.g. 2020 -> 93rd)
 def year_to_ceremony(year: int) -> int:
     return year - 1927
@@ -39,50 +138,54 @@ def parse_results_list(html: str) -> list[dict]:
       <a href="javascript:ExpandRecord(N);">Category</a> -- <i>Film</i>
       <a href="javascript:ExpandRecord(N);">Category</a> -- Winner (no film italic)
     """
-    # Pattern with film title and optional winner
-    pattern = re.compile(
-        r'ExpandRecord\((\d+)\);">'
-        r'([^<]+)'                # category
-        r'</a>\s*--\s*'
-        r'(?:<i>([^<]+)</i>)?'    # optional film title in <i>
-        r'(?:;\s*)?'              # optional semicolon separator
-        r'(.*?)'                  # winner (may be empty)
-        r'</p>',
-        re.DOTALL,
-    )
+    tree = lxml.html.fromstring(html)
     results = []
-    for m in pattern.finditer(html):
-        film = (m.group(3) or "").strip()
-        winner = m.group(4).strip()
-        # If no film in <i>, the text after -- is the winner
-        if not film and winner:
-            # Check if there's untagged text that's actually the winner
-            pass
+    for link in tree.xpath('//a[starts-with(@href, "javascript:ExpandRecord")]'):
+        m = _RECORD_ID_RE.search(link.get("href"))
+        if not m:
+            continue
+        film_el = link.getnext()
+        if film_el is not None and film_el.tag == "i":
+            film = film_el.text_content().strip()
+            winner = _text_after(film_el).strip().removeprefix(";")
+        else:
+            # No film in <i>: the text after -- is the winner
+            film = ""
+            winner = _text_after(link).strip().removeprefix("--")
         results.append({
             "record_num": int(m.group(1)),
-            "category": m.group(2).strip(),
+            "category": link.text_content().strip(),
             "film_title": film,
-            "winner": winner,
+            "winner": winner.strip(),
         })
     return results
 
 
-def extract_speech_text(page: Page) -> str | None:
-    """Extract speech text from an expanded record.
+def _text_after(el) -> str:
+    """Return the text following *el* up to the end of its parent element."""
+    parts = [el.tail or ""]
+    for sibling in el.itersiblings():
+        parts.append(sibling.text_content())
+        parts.append(sibling.tail or "")
+    return "".join(parts)
+
+
+def speech_html(page_html: str) -> str | None:
+    """Return the HTML of the <p class="MInormal"> speech element, if any."""
+    matches = lxml.html.fromstring(page_html).xpath('//p[@class="MInormal"]')
+    if not matches:
+        return None
+    return lxml.html.tostring(matches[0], encoding="unicode", with_tail=False)
+
+
+def extract_speech_text(inner: str) -> str | None:
+    """Extract speech text from the HTML of an expanded record's speech.
 
     The speech is inside a <p class="MInormal"> tag within a <font> block.
     The text uses <br> tags for line breaks.
     """
-    el = page.query_selector("p.MInormal")
-    if not el:
-        return None
-
-    # Get inner HTML and convert <br> to newlines
-    inner = el.inner_html()
-    # Remove the "WINNER NAME:" header at the start
-    text = re.sub(r"<br\s*/?>", "\n", inner, flags=re.IGNORECASE)
-    # Strip all remaining HTML tags
-    text = re.sub(r"<[^>]+>", "", text)
+    # Convert <br> to newlines and strip all other tags, in one pass
+    text = _HTML_CLEAN_RE.sub(_clean_tag, inner)
     # Clean up whitespace
     text = text.strip()
 
@@ -93,16 +196,153 @@ def extract_speech_text(page: Page) -> str | None:
     return text
 
 
-def scrape_year(page: Page, year: int) -> list[dict]:
-    """Scrape all speeches for a given year. Returns list of row dicts."""
-    url = SEARCH_URL.format(year=year)
-    page.goto(url, wait_until="domcontentloaded", timeout=60000)
-    time.sleep(3)
+def _is_retryable(e: Exception) -> bool:
+    """True for transient failures: timeouts, dropped connections, 429/5xx."""
+    if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+        return True
+    return (isinstance(e, requests.HTTPError) and e.response is not None
+            and e.response.status_code in RETRYABLE_STATUS)
 
-    html = page.content()
+
+def with_retries(fn, what: str):
+    """Call fn(), retrying transient errors with jittered exponential backoff."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS or not _is_retryable(e):
+                raise
+            delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+            delay += random.uniform(0, delay / 2)
+            print(f"    {what}: {e} (retrying in {delay:.1f}s)")
+            time.sleep(delay)
+
+
+_failed_lock = threading.Lock()
+
+
+def log_failure(year: int, record_num: int | None, error: Exception) -> None:
+    """Append a failed record (record_num None = whole year) to FAILED_PATH."""
+    entry = {"year": year, "record_num": record_num, "error": repr(error)}
+    with _failed_lock, open(FAILED_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+_pacer = RateLimiter(MIN_REQUEST_INTERVAL)
+
+
+def fetch(sessions: queue.Queue[requests.Session], url: str) -> str:
+    """GET *url* and return the response body, raising on HTTP errors.
+
+    Checks a session out of the pool for the duration of the request, blocking
+    while all of them are busy.
+    """
+    session = sessions.get()
+    try:
+        _pacer.wait()
+        response = session.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+    finally:
+        sessions.put(session)
+
+
+def make_session() -> requests.Session:
+    """Return a keep-alive HTTP session with the scraper's User-Agent."""
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def make_session_pool(size: int = MAX_IN_FLIGHT) -> queue.Queue[requests.Session]:
+    """Return a queue of *size* sessions for fetch() to check out.
+
+    requests.Session isn't documented as thread-safe, so rather than sharing
+    one across workers, each request gets a session to itself.
+    """
+    sessions: queue.Queue[requests.Session] = queue.Queue()
+    for _ in range(size):
+        sessions.put(make_session())
+    return sessions
+
+
+def scrape_record(
+    sessions: queue.Queue[requests.Session],
+    info: dict,
+    year: int,
+    num_records: int,
+) -> dict | None:
+    """Fetch one record's detail page. Returns a row dict or None."""
+    n = info["record_num"]
+    url = DETAIL_URL.format(year=year, rn=n - 1)
+    try:
+        html = with_retries(lambda: fetch(sessions, url), f"[{n}/{num_records}]")
+    except Exception as e:
+        print(f"    [{n}/{num_records}] ERROR: {e}")
+        log_failure(year, n, e)
+        return None
+
+    return record_row(info, year, num_records, speech_html(html), url)
+
+
+def record_row(
+    info: dict,
+    year: int,
+    num_records: int,
+    inner: str | None,
+    source: str,
+) -> dict | None:
+    """Turn one record's speech HTML (*inner*) into a row dict, or None.
+
+    A record with no speech still gets a row, with speech None (an empty CSV
+    field that load_academy drops), so resume knows it's done.
+
+    A record without a speech paragraph is logged to FAILED_PATH rather than
+    counted as "no speech", so a page that isn't a record (e.g. from a wrong
+    DETAIL_URL) shows up as a failure.
+    """
+    n = info["record_num"]
+    if inner is None:
+        e = ValueError(f'no <p class="MInormal"> in record page from {source}')
+        print(f"    [{n}/{num_records}] ERROR: {e}")
+        log_failure(year, n, e)
+        return None
+    speech = extract_speech_text(inner)
+    if speech:
+        print(f"    [{n}/{num_records}] {info['category']} - {info['winner']} ({len(speech)} chars)")
+    else:
+        print(f"    [{n}/{num_records}] {info['category']} - {info['winner']} (no speech)")
+    return {
+        "year": year,
+        "ceremony": year_to_ceremony(year),
+        "category": info["category"],
+        "film_title": info["film_title"],
+        "winner": info["winner"],
+        "speech": speech,
+        "record_num": n,
+    }
+
+
+def count_speeches(rows: list[dict]) -> int:
+    """Number of rows that have a speech (no-speech records are kept too)."""
+    return sum(row["speech"] is not None for row in rows)
+
+
+def scrape_year(sessions: queue.Queue[requests.Session], year: int,
+                concurrency: int = CONCURRENCY,
+                done: set[tuple[int, int]] = frozenset()) -> list[dict]:
+    """Scrape all speeches for a given year. Returns list of row dicts.
+
+    Records whose (year, record_num) is in *done* are skipped.
+    """
+    url = SEARCH_URL.format(year=year)
+    html = with_retries(lambda: fetch(sessions, url), f"{year} results list")
 
     # Get record count
-    count_match = re.search(r"(\d+)\s+records?\s+found", html, re.IGNORECASE)
+    count_match = _COUNT_RE.search(html)
     if not count_match:
         print(f"  {year}: No records found on page, skipping")
         return []
@@ -113,90 +353,209 @@ def scrape_year(page: Page, year: int) -> list[dict]:
     # Parse the results list for category/film/winner info
     results = parse_results_list(html)
     print(f"  {year}: parsed {len(results)} result entries")
+    if len(results) != num_records:
+        # The list may be incomplete without JS; record it so it isn't missed
+        log_failure(year, None, ValueError(
+            f"results list has {len(results)} ExpandRecord links for {num_records} records"))
+    todo = [info for info in results if (year, info["record_num"]) not in done]
+    if len(todo) < len(results):
+        print(f"  {year}: {len(results) - len(todo)} already saved, skipping those")
+
+    # Fetch record pages concurrently; map() keeps the results-list order
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        rows = list(ex.map(
+            lambda info: scrape_record(sessions, info, year, num_records), todo))
+    return [row for row in rows if row]
+
+
+def http_path_works(sessions: queue.Queue[requests.Session], year: int) -> bool:
+    """Probe the plain-HTTP path on *year*; False if the browser is needed.
+
+    Checks that the results list fetched without JS has the "N records
+    found" banner and N ExpandRecord links, and that DETAIL_URL returns a
+    speech paragraph for the first record.
+    """
+    try:
+        html = with_retries(lambda: fetch(sessions, SEARCH_URL.format(year=year)),
+                            f"{year} probe")
+        count_match = _COUNT_RE.search(html)
+        results = parse_results_list(html)
+        if not count_match or len(results) != int(count_match.group(1)):
+            print(f"Results list for {year} without JS: banner "
+                  f"{count_match.group(0) if count_match else 'missing'!r}, "
+                  f"{len(results)} ExpandRecord links")
+            return False
+        if not results:
+            return True  # nothing to probe against; the year will log its own errors
+        url = DETAIL_URL.format(year=year, rn=results[0]["record_num"] - 1)
+        return speech_html(with_retries(lambda: fetch(sessions, url), f"{year} probe")) is not None
+    except Exception as e:
+        print(f"DETAIL_URL probe failed: {e}")
+        return False
+
+
+def scrape_year_browser(page, year: int, done: set[tuple[int, int]] = frozenset()) -> list[dict]:
+    """Scrape one year by clicking through ExpandRecord() in a browser page.
+
+    The fallback for when DETAIL_URL doesn't work: slow (sequential, with
+    fixed waits for the page's JS) but it uses the site's own navigation.
+    """
+    url = SEARCH_URL.format(year=year)
+    page.goto(url, wait_until="domcontentloaded", timeout=60000)
+    time.sleep(3)
+    html = page.content()
 
-    ceremony = year_to_ceremony(year)
-    rows = []
+    count_match = _COUNT_RE.search(html)
+    if not count_match:
+        print(f"  {year}: No records found on page, skipping")
+        return []
+    num_records = int(count_match.group(1))
+    results = parse_results_list(html)
+    print(f"  {year}: {num_records} records found, parsed {len(results)} result entries")
 
+    rows = []
     for info in results:
         n = info["record_num"]
+        if (year, n) in done:
+            continue
         try:
-            # Expand record to get speech text
             page.evaluate(f"ExpandRecord({n})")
             time.sleep(2)
             page.wait_for_load_state("domcontentloaded")
-
-            speech = extract_speech_text(page)
-
-            if speech:
-                row = {
-                    "year": year,
-                    "ceremony": ceremony,
-                    "category": info["category"],
-                    "film_title": info["film_title"],
-                    "winner": info["winner"],
-                    "speech": speech,
-                }
+            el = page.query_selector("p.MInormal")
+            row = record_row(info, year, num_records,
+                             el.inner_html() if el else None, "ExpandRecord")
+            if row:
                 rows.append(row)
-                print(f"    [{n}/{num_records}] {info['category']} - {info['winner']} ({len(speech)} chars)")
-            else:
-                print(f"    [{n}/{num_records}] {info['category']} - {info['winner']} (no speech)")
-
-            # Go back to results list
             page.go_back(wait_until="domcontentloaded", timeout=30000)
             time.sleep(1.5)
-
         except Exception as e:
             print(f"    [{n}/{num_records}] ERROR: {e}")
-            # Try to recover by navigating back to the results page
+            log_failure(year, n, e)
+            # Recover by reloading the results list
             try:
                 page.goto(url, wait_until="domcontentloaded", timeout=60000)
                 time.sleep(3)
             except Exception:
                 pass
-
     return rows
 
 
-def save_rows(rows: list[dict], path: Path) -> None:
-    """Write scraped rows to CSV."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = ["year", "ceremony", "category", "film_title", "winner", "speech"]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"\nWrote {len(rows)} rows to {path}")
+def scrape_with_browser(
+    years: range,
+    done: set[tuple[int, int]],
+    save: Callable[[list[dict]], None],
+) -> None:
+    """Scrape *years* one at a time in headless Chromium, passing each year's
+    rows to *save*."""
+    from playwright.sync_api import sync_playwright  # only needed for the fallback
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_context(user_agent=USER_AGENT).new_page()
+        for year in years:
+            print(f"\nScraping {year} (browser)...")
+            try:
+                rows = scrape_year_browser(page, year, done)
+            except Exception as e:
+                print(f"  {year}: ERROR fetching results list: {e}")
+                log_failure(year, None, e)
+                rows = []
+            print(f"  Got {count_speeches(rows)} speeches for {year}")
+            save(rows)
+        browser.close()
+
+
+def load_saved_keys(path: Path) -> set[tuple[int, int]] | None:
+    """Return the (year, record_num) pairs already saved in *path*.
+
+    Returns an empty set if the file doesn't exist, or None if it was written
+    with different columns and so can't be appended to.
+    """
+    if not path.exists():
+        return set()
+    # Speeches span multiple lines inside quoted fields
+    parse_options = pacsv.ParseOptions(newlines_in_values=True)
+    with pacsv.open_csv(path, parse_options=parse_options) as reader:
+        if reader.schema.names != OUT_SCHEMA.names:
+            return None
+    table = pacsv.read_csv(
+        path,
+        parse_options=parse_options,
+        convert_options=pacsv.ConvertOptions(include_columns=["year", "record_num"]),
+    )
+    return set(zip(table["year"].to_pylist(), table["record_num"].to_pylist()))
 
 
 def main():
     parser = argparse.ArgumentParser(description="Scrape Academy Awards speeches")
     parser.add_argument("--start-year", type=int, default=2017)
     parser.add_argument("--end-year", type=int, default=2024)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"Records fetched in parallel per year (default {CONCURRENCY})")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Overwrite the output file instead of resuming it")
+    parser.add_argument("--browser", action="store_true",
+                        help="Drive ExpandRecord() in headless Chromium instead of fetching DETAIL_URL")
     args = parser.parse_args()
 
-    all_rows = []
+    done = set() if args.fresh else load_saved_keys(OUT_PATH)
+    if done is None:
+        print(f"{OUT_PATH.name} has different columns; starting over")
+        done = set()
+    resume = bool(done)
+    if resume:
+        print(f"Resuming: {len(done)} records already saved in {OUT_PATH.name}")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            )
-        )
-        page = context.new_page()
-
-        for year in range(args.start_year, args.end_year + 1):
-            print(f"\nScraping {year}...")
-            rows = scrape_year(page, year)
-            all_rows.extend(rows)
-            print(f"  Got {len(rows)} speeches for {year}")
-            time.sleep(2)  # Be polite between years
+    sessions = make_session_pool()
+    years = range(args.start_year, args.end_year + 1)
 
-        browser.close()
+    # Failures are logged fresh each run; a rerun retries them via resume
+    FAILED_PATH.parent.mkdir(parents=True, exist_ok=True)
+    FAILED_PATH.unlink(missing_ok=True)
+
+    use_browser = args.browser
+    if not use_browser and not http_path_works(sessions, args.start_year):
+        print("Plain HTTP didn't return the expected pages; falling back to the browser")
+        use_browser = True
 
-    save_rows(all_rows, OUT_PATH)
+    def run_year(year: int) -> list[dict]:
+        print(f"\nScraping {year}...")
+        try:
+            rows = scrape_year(sessions, year, args.concurrency, done)
+        except Exception as e:
+            print(f"  {year}: ERROR fetching results list: {e}")
+            log_failure(year, None, e)
+            return []
+        print(f"  Got {count_speeches(rows)} speeches for {year}")
+        return rows
+
+    # Append each year's rows as soon as it finishes, so a crash only loses
+    # the years still in flight.  Each year is one Arrow table written by
+    # pyarrow's CSV writer; flush per year, not per row.
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    write_options = pacsv.WriteOptions(include_header=not resume)
+    with open(OUT_PATH, "ab" if resume else "wb") as f, \
+            pacsv.CSVWriter(f, OUT_SCHEMA, write_options=write_options) as writer:
+
+        def save(rows: list[dict]) -> None:
+            nonlocal written
+            if rows:
+                writer.write_table(pa.Table.from_pylist(rows, schema=OUT_SCHEMA))
+                f.flush()
+            written += len(rows)
+
+        if use_browser:
+            scrape_with_browser(years, done, save)
+        else:
+            with ThreadPoolExecutor(max_workers=YEAR_WORKERS) as ex:
+                for future in as_completed([ex.submit(run_year, y) for y in years]):
+                    save(future.result())
+
+    print(f"\nWrote {written} new rows to {OUT_PATH}")
+    if FAILED_PATH.exists():
+        print(f"Some records failed; see {FAILED_PATH} (re-run to retry them)")
 
 
 if __name__ == "__main__":
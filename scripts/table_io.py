@@ -0,0 +1,47 @@
+"""Read/write helpers for the pipeline's intermediate tables.
+
+Intermediate artifacts (cleaned speeches, labels, merged output) are stored
+as Parquet, which keeps column types (nullable ints, categories) between
+stages.  CSV paths are still accepted, e.g. for hand-made test subsets, and
+a .parquet path that doesn't exist yet falls back to the .csv file earlier
+versions of the pipeline wrote there; the next save writes the Parquet file.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from config import CSV_DTYPES, CSV_READ_KW
+
+
+def resolve_table(path: Path) -> Path:
+    """Return *path*, or its legacy .csv sibling if only that exists."""
+    if path.suffix == ".parquet" and not path.exists():
+        legacy = path.with_suffix(".csv")
+        if legacy.exists():
+            return legacy
+    return path
+
+
+def read_table(path: Path) -> pd.DataFrame:
+    """Load a table from Parquet or CSV, depending on the file suffix.
+
+    A missing .parquet file is read from its legacy .csv sibling if present.
+    """
+    resolved = resolve_table(path)
+    if resolved != path:
+        print(f"{path.name} not found; reading legacy {resolved.name}")
+        path = resolved
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype=CSV_DTYPES, **CSV_READ_KW)
+
+
+def write_table(df: pd.DataFrame, path: Path) -> None:
+    """Write a table as Parquet or CSV, depending on the file suffix."""
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)